@@ -1,5 +1,6 @@
 import cmath
 import math
+import operator
 import random
 
 """
@@ -68,46 +69,88 @@ def NormalizedToOne(weights:list[float]) -> list[float]:
     set.
     """
     assert weights, "Empty sequence of weights"
-    absw = [abs(w) for w in weights]
-    s = sum(absw)
-    return [1/len(absw)]*len(absw) if s<EPSILON else [w/s for w in weights]
+    s = sum(map(abs, weights))
+    return [1/len(weights)]*len(weights) if s<EPSILON else [w/s for w in weights]
 
 def WeightedChoice(weights:list[float]) -> int:
     """
     A random integer 0...len(weights)-1, w.r.t. given distribution (weights).
+    All-zero weights yield 0.
     """
-    r = random.uniform(0, sum(weights))
-    upto = 0
-    for i,w in enumerate(weights):
-        if upto+w >= r: return i
-        upto += w
-    assert False, "Random overflow"
+    if not any(weights): return 0
+    return random.choices(range(len(weights)), weights)[0]
+
+class AliasTable:
+    """
+    A discrete distribution prepared for repeated sampling
+    (Walker's alias method, in the linear-time construction of Vose).
+
+    Construction takes O(len(weights)) time, then each Sample() takes O(1):
+    one uniform integer, one uniform real number and one comparison.
+    It pays off when the same distribution is sampled many times;
+    for a single sample WeightedChoice() is as good.
+    """
+
+    def __init__(self, weights:list[float]) -> None:
+        """
+        <weights> are non-negative and not all zero; they need not sum up to one.
+        """
+        n = len(weights)
+        total = sum(weights)
+        assert n and total>0, "Empty distribution"
+        scaled = [w*n/total for w in weights]
+        self._Probabilities = [1.0] * n
+        self._Aliases = list(range(n))
+        small = [i for i,q in enumerate(scaled) if q<1]
+        large = [i for i,q in enumerate(scaled) if q>=1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._Probabilities[s] = scaled[s]
+            self._Aliases[s] = l
+            scaled[l] += scaled[s]-1
+            (small if scaled[l]<1 else large).append(l)
+        # leftovers of either list are 1.0 up to rounding errors
+
+    def Sample(self) -> int:
+        """
+        A random integer 0...len(weights)-1, w.r.t. the prepared distribution.
+        """
+        i = random.randrange(len(self._Aliases))
+        return i if random.random() < self._Probabilities[i] else self._Aliases[i]
+
+def InverseDistanceWeighting(distances2:list[float], payoffs:list[float]) -> float:
+    """
+    Predicts payoff at some point, given squared distances <distances2>
+    from this point to the points with known <payoffs>.
+
+    If some of the known points (almost) coincide with the given one, returns
+    their mean payoff. Otherwise returns the mean of all known payoffs
+    weighted by inverse squared distances.
+    """
+    result, weight = 0.0, 0.0
+    coincidents = []
+    for distance2,payoff in zip(distances2,payoffs):
+        if distance2 < EPSILON:
+            coincidents.append(payoff)
+        elif not coincidents:
+            w = 1 / distance2
+            result += payoff*w
+            weight += w
+    return sum(coincidents)/len(coincidents) if coincidents else result/max(weight,EPSILON)
 
 def RandomBasis(d:int) -> list[list[float]]:
     """
     Gram-Schmidt-orthonormalized random real d-dimensional -1..1-vectors.
     """
-    b = [None]*d
-    inner = [None]*d
-    for i in range(d):
-        b[i] = [None]*d
-        while True:
-           for j in range(d):
-               b[i][j] = random.random()*2-1
-           for j in range(i):
-               innerij = 0
-               for k in range(d):
-                   innerij += b[i][k]*b[j][k]
-               for k in range(d):
-                   b[i][k] -= innerij/inner[j]*b[j][k]
-           inner[i] = 0
-           for k in range(d):
-               inner[i] += b[i][k]**2
-           if inner[i]>0.00001:
-               break
-    for i in range(d):
-        for k in range(d):
-            b[i][k] /= inner[i]**0.5
+    b = []
+    while len(b) < d:
+        v = [random.random()*2-1 for _ in range(d)]
+        for u in b:
+            inner = sum(map(operator.mul,v,u))
+            v = [vk-inner*uk for vk,uk in zip(v,u)]
+        norm = math.hypot(*v)
+        if norm**2>0.00001:
+            b.append([vk/norm for vk in v])
     return b
 
 def Unitary(theta:list[float], phi=None, gamma=None) -> list[list[complex]]:
@@ -134,17 +177,22 @@ def Unitary(theta:list[float], phi=None, gamma=None) -> list[list[complex]]:
         N = int(len(theta)**0.5+0.1)
         theta, phi, gamma = theta[:-N:2], theta[1:-N:2], theta[-N:]
     N = len(gamma)
-    U = [[int(i==j) for i in range(N)] for j in range(N)]
+    U = [[complex(i==j) for i in range(N)] for j in range(N)]
     k = 0
     for j1 in range(N-1):
         for j2 in range(j1+1,N):
+            if theta[k] == 0: # no rotation, only the sign of row j2 flips
+                U[j2] = [0-u2 for u2 in U[j2]] # 0-u2 keeps zeros unsigned, unlike -u2
+                k += 1
+                continue
             ep, st, ct = cmath.exp(1j*math.pi*phi[k]), math.sin(math.pi*theta[k]), math.cos(math.pi*theta[k])
-            U[j1], U[j2] = [U[j1][i]*ct+U[j2][i]*st*ep for i in range(N)], [U[j1][i]*st/ep-U[j2][i]*ct for i in range(N)]
+            step, stdep = st*ep, st/ep
+            U[j1], U[j2] = [u1*ct+u2*step for u1,u2 in zip(U[j1],U[j2])], [u1*stdep-u2*ct for u1,u2 in zip(U[j1],U[j2])]
             k += 1
-    for j in range(N):
-        for i in range(N):
-            U[j][i] *= cmath.exp(1j*math.pi*gamma[i])
-    return U
+    if not any(gamma):
+        return U
+    phases = [cmath.exp(1j*math.pi*g) if g else 1 for g in gamma]
+    return [[u*p for u,p in zip(row,phases)] for row in U]
 
 def test_unitary():
     repr_complex = lambda c: ('{0.real:.2f}' if abs(c.imag)<0.001 else ('{0.imag:.2f}j' if abs(c.real)<0.001 else '{:.2f}')).format(c)
@@ -249,8 +297,8 @@ class ClassicalCorrelation(Correlation):
         identical copies of the register should be broadcasted to all agents.
         All local operations are impartial by default.
         """
-        self._Operations = [[1/self.RegisterSize]*self.RegisterSize for _ in self._Agents]
-        self._Register = tuple(random.uniform(0,1) for _ in range(self.RegisterSize))
+        self._Operations = [[1/self.RegisterSize]*self.RegisterSize] * len(self._Agents)
+        self._Register = [random.random() for _ in range(self.RegisterSize)]
 
     def LocalOperationParametersCount(self) -> int:
         """
@@ -281,11 +329,59 @@ class ClassicalCorrelation(Correlation):
         """
         self._Observables = []
         for operation in self._Operations:
-            weights = [self._Register[i]*abs(operation[i]) for i in range(self.RegisterSize)]
-            self._Observables.append(max(range(self.RegisterSize), key=lambda i:weights[i]))
+            weights = [r*abs(w) for r,w in zip(self._Register,operation)]
+            self._Observables.append(weights.index(max(weights)))
 
 class QuantumCorrelation(Correlation):
 
+    # Immutable data, which depends only on sizes and is shared by all instances:
+    _Identities = dict() # RegisterSize --> identity matrix
+    _Setups = dict() # (RegisterSize, number of Agents) --> (initial state, fibers)
+
+    def __init__(self, RegisterSize:int) -> None:
+        """
+        Besides the register, keeps the local operations of the last
+        observation and, once they have been repeated, their distribution
+        (see Observe()): while the same local operations are applied again,
+        the measurement is sampled without recomputing the quantum state.
+
+        <_Identity> is the default local operation shared by all Agents;
+        it is a tuple of tuples, so that nobody could modify it in place.
+        """
+        super().__init__(RegisterSize)
+        if RegisterSize not in QuantumCorrelation._Identities:
+            QuantumCorrelation._Identities[RegisterSize] = tuple(tuple(int(i==j) for i in range(RegisterSize)) for j in range(RegisterSize))
+        self._Identity = QuantumCorrelation._Identities[RegisterSize]
+        self._DistributionKey = None
+        self._Distribution = None
+
+    def RegisterAgent(self, AgentId:int) -> None:
+        """
+        Grants access to the shared randomness for a given Agent.
+        Each registered agent will be able to observe a
+        <RegisterSize>-dimensional variable.
+
+        Also looks up the initial quantum state for the new number of Agents
+        (see Prepare()), so that plays do not have to build it again.
+        Likewise, <_Fibers> lists for each Agent the slices of the state
+        vector along the digit of this Agent (see _Probabilities()).
+        Both are built once per sizes and shared by all instances.
+        """
+        super().RegisterAgent(AgentId)
+        key = (self.RegisterSize, len(self._Agents))
+        if key not in QuantumCorrelation._Setups:
+            state = [0] * self.RegisterSize**len(self._Agents)
+            step = sum(self.RegisterSize**a for a in range(len(self._Agents)))
+            state[::step] = [self.RegisterSize**-0.5] * self.RegisterSize
+            fibers = []
+            stride = len(state)
+            for _ in self._Agents: # the first Agent owns the most significant digit
+                stride //= self.RegisterSize
+                block = stride*self.RegisterSize
+                fibers.append(tuple(slice(j, j+block, stride) for start in range(0, len(state), block) for j in range(start, start+stride)))
+            QuantumCorrelation._Setups[key] = (tuple(state), tuple(fibers))
+        self._InitialState, self._Fibers = QuantumCorrelation._Setups[key]
+
     def Prepare(self) -> None:
         """
         Generates a new public signal for the next play.
@@ -297,11 +393,11 @@ class QuantumCorrelation(Correlation):
         (|11...1> + |22...2> + ... + |rr...r>) / Sqrt(r),
         where    r = <RegisterSize>
         and each |ii...i> contains #<Agents> digits i
+        The state is built once by RegisterAgent() and shared by all plays:
+        local operations never modify it in place.
         """
-        self._Matrices = [[[int(i==j) for i in range(self.RegisterSize)] for j in range(self.RegisterSize)] for _ in self._Agents]
-        self._QuantumState = [0] * self.RegisterSize**len(self._Agents)
-        step = sum(self.RegisterSize**a for a in self._Agents.values())
-        self._QuantumState[::step] = [self.RegisterSize**-0.5] * self.RegisterSize
+        self._Parameters = [None] * len(self._Agents)
+        self._QuantumState = self._InitialState
 
     def LocalOperationParametersCount(self) -> int:
         """
@@ -318,9 +414,12 @@ class QuantumCorrelation(Correlation):
         and applied before Observe().
         In quantum correlations,
         a local operation is usually represented as a unitary matrix.
+        Only its parameters are recorded here: the matrix is built by
+        _Probabilities(), so that repeated local operations, which Observe()
+        samples from a cached distribution, never rebuild it.
         """
         super().LocalOperation(AgentId, Parameters)
-        self._Matrices[self._Agents[AgentId]] = Unitary(Parameters)
+        self._Parameters[self._Agents[AgentId]] = tuple(Parameters)
 
     def Observe(self) -> None:
         """
@@ -330,24 +429,54 @@ class QuantumCorrelation(Correlation):
         to one of component states of a quantum system.
         Technically, Observe() multiplies quantum state vector by the tensor
         product of all local operations, which are unitary matrices.
-        """
-        state = [0] * self.RegisterSize**len(self._Agents)
-        for j in range(len(state)):
-            for i in range(len(state)):
-                tensor_ji, tj, ti = 1, j, i
-                for a in range(len(self._Agents)-1,-1,-1):
-                    tensor_ji *= self._Matrices[a][tj%self.RegisterSize][ti%self.RegisterSize]
-                    tj //= self.RegisterSize
-                    ti //= self.RegisterSize
-                state[i] += self._QuantumState[j]*tensor_ji
-        probabilities = [abs(amplitude**2) for amplitude in state]
-        measurement = WeightedChoice(probabilities)
+        New local operations take a single WeightedChoice(). Only when the
+        same local operations are measured again, an AliasTable is built and
+        reused while they stay the same: learning automata change their
+        local operations every round, so a table built on the first
+        measurement would never pay off.
+        """
+        key = tuple(self._Parameters)
+        if key != self._DistributionKey:
+            self._DistributionKey, self._Distribution = key, None
+            measurement = WeightedChoice(self._Probabilities())
+        else:
+            if self._Distribution is None:
+                self._Distribution = AliasTable(self._Probabilities())
+            measurement = self._Distribution.Sample()
         self._Observables = [None] * len(self._Agents)
         for a in range(len(self._Agents)-1,-1,-1):
             self._Observables[len(self._Agents)-1-a] = measurement % self.RegisterSize
             measurement //= self.RegisterSize
         assert measurement==0, "Observable was too large"
 
+    def _Probabilities(self) -> list[float]:
+        """
+        Returns probabilities of all outcomes of the measurement
+        after all local operations.
+        The tensor product is never built: each local operation is applied
+        along the digit of its own Agent, one Agent at a time.
+
+        Two Agents (e.g. CHSH) are the most common case. Starting from the
+        entangled state (|11> + ... + |rr>) / Sqrt(r), amplitude of |ij> is
+        then just the product of column i of the first matrix and column j
+        of the second one, divided by Sqrt(r).
+        """
+        matrices = [self._Identity if parameters is None else Unitary(parameters) for parameters in self._Parameters]
+        if len(matrices) == 2:
+            first, second = (tuple(zip(*matrix)) for matrix in matrices)
+            amplitudes = (sum(map(operator.mul, column1, column2)) for column1 in first for column2 in second)
+            return [(amplitude.real*amplitude.real + amplitude.imag*amplitude.imag)/self.RegisterSize for amplitude in amplitudes]
+        state = self._QuantumState
+        for matrix,fibers in zip(matrices,self._Fibers):
+            columns = tuple(zip(*matrix))
+            transformed = [0] * len(state)
+            for fiber in fibers:
+                amplitudes = state[fiber]
+                if any(amplitudes): # the entangled state is sparse until most Agents have operated
+                    transformed[fiber] = [sum(map(operator.mul, amplitudes, column)) for column in columns]
+            state = transformed
+        return [amplitude.real*amplitude.real + amplitude.imag*amplitude.imag for amplitude in state]
+
 def test_correlations():
     # try some arbitrary classical local operations
     def classical_probabilities(LO_1, LO_2):
@@ -460,24 +589,32 @@ class LearningAutomaton:
 
         Memory of an automaton is intended for keeping its previous experience.
         <MemorySize> denotes the number of last plays and corresponding payoffs
-        to be remembered.
+        to be remembered; it should be positive.
 
         An automaton can be sensitive or less sensitive to new experience.
         <LearningRate> is a tradeoff between
         (A) speed of learning ("sensitivity") and
         (B) sustainability + better precision ("insensitivity").
 
-        <_Memory> keeps records of previous plays
+        <_MemoryObservables>, <_MemoryLocalOperations>, <_MemoryMixedChoices>
+        and <_MemoryPayoffs> keep records of previous plays, field by field,
+        as a ring buffer: when full, the oldest record at <_MemoryHead>
+        is overwritten.
         <_Strategy> stands for current set of strategy-defining parameters.
         <_TotalPayoff> and <_TotalPlayed> are intended for statistical purposes.
         """
+        assert MemorySize > 0, f"MemorySize should be positive: {MemorySize}"
         correlation.RegisterAgent(AgentId=id(self))
         self._Correlation = correlation
         self._ChoicesCount = ChoicesCount
         self._MemorySize = MemorySize
         self._LearningRate = LearningRate
         self._LocalOperationParametersCount = correlation.LocalOperationParametersCount()
-        self._Memory = []
+        self._MemoryObservables = []
+        self._MemoryLocalOperations = []
+        self._MemoryMixedChoices = []
+        self._MemoryPayoffs = []
+        self._MemoryHead = 0
         self._Strategy = [0.0]*(self._LocalOperationParametersCount+correlation.RegisterSize*ChoicesCount)
         self._TotalPayoff = 0
         self._TotalPlayed = 0
@@ -490,18 +627,9 @@ class LearningAutomaton:
 
         Only local operation parameters should be given in <strategy>.
         """
-        result, weight = 0.0, 0.0
-        coincidents = []
-        for _,local_operation,_,payoff in self._Memory:
-            distance2 = sum(((s1-s2)**2 for s1,s2 in zip(strategy,local_operation)))
-            if distance2 < EPSILON:
-                coincidents.append(payoff)
-            elif not coincidents:
-                w = 1 / distance2
-                result += payoff*w
-                weight += w
-        ### if coincidents: print("COINCIDENTS!", coincidents)
-        return sum(coincidents)/len(coincidents) if coincidents else result/max(weight,EPSILON)
+        return InverseDistanceWeighting(
+            [math.dist(strategy,local_operation)**2 for local_operation in self._MemoryLocalOperations],
+            self._MemoryPayoffs)
 
     def PredictMixedChoicePayoff(self, strategy:list[float]) -> float:
         """
@@ -510,20 +638,39 @@ class LearningAutomaton:
 
         Only weights for <self._Observable> should be given in <strategy>.
         """
-        result, weight = 0.0, 0.0
-        coincidents = []
-        for observable,local_operation,mixed_choice,payoff in self._Memory:
-            if observable != self._Observable: continue
-            distance2 = sum(((s1-s2)**2 for s1,s2 in zip(strategy,mixed_choice)))
-            distance2 += sum(((s1-s2)**2 for s1,s2 in zip(self._Strategy[:self._LocalOperationParametersCount],local_operation)))
-            if distance2 < EPSILON:
-                coincidents.append(payoff)
-            elif not coincidents:
-                w = 1 / distance2
-                result += payoff*w
-                weight += w
-        ### if coincidents: print("COINCIDENTS!", coincidents)
-        return sum(coincidents)/len(coincidents) if coincidents else result/max(weight,EPSILON)
+        mixed_choices, payoffs, extras = self._ObservedRecords()
+        return InverseDistanceWeighting(
+            [math.dist(strategy,mixed_choice)**2+extra for mixed_choice,extra in zip(mixed_choices,extras)],
+            payoffs)
+
+    def _ObservedRecords(self) -> tuple[list,list[float],list[float]]:
+        """
+        Returns mixed choices, payoffs and squared distances between
+        local operations (recorded vs current ones) of the records made
+        with the current <_Observable>.
+        """
+        current_local_operation = self._Strategy[:self._LocalOperationParametersCount]
+        records = [r for r,observable in enumerate(self._MemoryObservables) if observable==self._Observable]
+        return ([self._MemoryMixedChoices[r] for r in records],
+                [self._MemoryPayoffs[r] for r in records],
+                [math.dist(current_local_operation,self._MemoryLocalOperations[r])**2 for r in records])
+
+    def _BestNearbyStrategy(self, strategy:list[float], known:list, payoffs:list[float], extras:list[float]=None) -> list[float]:
+        """
+        Returns the best of 2*len(<strategy>) strategies at distance
+        <_LearningRate> from <strategy> along random orthonormal directions.
+
+        Payoffs are predicted as in PredictLocalOperationPayoff() from
+        <known> strategies and their <payoffs>, while <extras> (if any) are
+        added to the squared distances to the <known> strategies.
+        """
+        candidates = [[S+d*t for S,d in zip(strategy,direction)] for direction in RandomBasis(len(strategy)) for t in (+self._LearningRate,-self._LearningRate)]
+        # candidates += [[random.random()*2-1 for _ in range(len(strategy))]]
+        if extras is None:
+            return max(candidates, key=lambda candidate: InverseDistanceWeighting(
+                [math.dist(candidate,k)**2 for k in known], payoffs))
+        return max(candidates, key=lambda candidate: InverseDistanceWeighting(
+            [math.dist(candidate,k)**2+extra for k,extra in zip(known,extras)], payoffs))
 
     def Operate(self) -> None:
         """
@@ -535,11 +682,11 @@ class LearningAutomaton:
 
         Then performs the corresponding local operation.
         """
-        self._Strategy[:self._LocalOperationParametersCount] = max(
-            # [[random.random()*2-1 for _ in range(self._LocalOperationParametersCount)]] +
-            [[S+d*t for S,d in zip(self._Strategy[:self._LocalOperationParametersCount],direction)] for direction in RandomBasis(self._LocalOperationParametersCount) for t in (+self._LearningRate,-self._LearningRate)],
-            key = self.PredictLocalOperationPayoff)
-        self._Correlation.LocalOperation(id(self), self._Strategy[:self._LocalOperationParametersCount])
+        local_operation = self._BestNearbyStrategy(
+            self._Strategy[:self._LocalOperationParametersCount],
+            self._MemoryLocalOperations, self._MemoryPayoffs)
+        self._Strategy[:self._LocalOperationParametersCount] = local_operation
+        self._Correlation.LocalOperation(id(self), local_operation)
 
     def Choose(self) -> list[float]:
         """
@@ -555,11 +702,9 @@ class LearningAutomaton:
         self._Observable = self._Correlation.Observable(id(self))
         a = self._LocalOperationParametersCount + self._ChoicesCount*self._Observable
         b = a + self._ChoicesCount
-        self._Strategy[a:b] = max(
-            # [[random.random()*2-1 for _ in range(self._ChoicesCount)]] +
-            [[S+d*t for S,d in zip(self._Strategy[a:b],direction)] for direction in RandomBasis(self._ChoicesCount) for t in (+self._LearningRate,-self._LearningRate)],
-            key = self.PredictMixedChoicePayoff)
-        return NormalizedToOne(tuple(map(abs, self._Strategy[a:b])))
+        mixed_choice = self._BestNearbyStrategy(self._Strategy[a:b], *self._ObservedRecords())
+        self._Strategy[a:b] = mixed_choice
+        return NormalizedToOne(list(map(abs, mixed_choice)))
 
     def Remember(self, payoff:float) -> None:
         """
@@ -568,13 +713,19 @@ class LearningAutomaton:
 
         Also updates statistics.
         """
-        self._Memory.append((
+        a = self._LocalOperationParametersCount + self._ChoicesCount*self._Observable
+        record = (
             self._Observable,
             tuple(self._Strategy[:self._LocalOperationParametersCount]),
-            tuple(self._Strategy[self._LocalOperationParametersCount+self._ChoicesCount*self._Observable:][:self._ChoicesCount]),
+            tuple(self._Strategy[a:a+self._ChoicesCount]),
             payoff
-        ))
-        self._Memory = self._Memory[-self._MemorySize:]
+        )
+        fields = (self._MemoryObservables, self._MemoryLocalOperations, self._MemoryMixedChoices, self._MemoryPayoffs)
+        if len(self._MemoryPayoffs) < self._MemorySize:
+            for field,value in zip(fields,record): field.append(value)
+        else:
+            for field,value in zip(fields,record): field[self._MemoryHead] = value
+        self._MemoryHead = (self._MemoryHead+1) % self._MemorySize
         self._TotalPayoff += payoff
         self._TotalPlayed += 1
 
@@ -584,7 +735,34 @@ class LearningAutomaton:
         """
         return self._TotalPayoff/max(1,self._TotalPlayed)
 
-def play(Game, correlation:Correlation, LearningRate:float=0.01, MemorySize:int=100, iterations:int=100, adversarial:bool=False):
+def Flattened(nest, depth:int) -> list:
+    """
+    Returns items of a nested list in row-major order,
+    flattening <depth> levels of nesting.
+    """
+    for _ in range(depth):
+        nest = [item for sub in nest for item in sub]
+    return nest
+
+def ExpectedPayoffs(payoffs:list[list[float]], choices:list[list[float]]) -> list[float]:
+    """
+    Returns expected payoffs of all N players.
+
+    <payoffs>[i] lists payoffs of the i-th player over all choice profiles,
+    i.e. Flattened(<nest>, N)[i::N] for a nested list with tuples of payoffs
+    on its leaves: nest[Choice_1]...[Choice_N] = (Payoff1,...,PayoffN),
+    <choices> are the mixed strategies of the players, i.e. probability
+    distributions over Choice_1,...,Choice_N.
+
+    Computes the joint distribution of all choice profiles (in the same
+    row-major order), then a single inner product per player.
+    """
+    joint = [1.0]
+    for probabilities in choices:
+        joint = [pr*p for pr in joint for p in probabilities]
+    return [sum(map(operator.mul, joint, player_payoffs)) for player_payoffs in payoffs]
+
+def play(Game, correlation:Correlation, LearningRate:float=0.01, MemorySize:int=100, iterations:int=100, adversarial:bool=False, tolerance:float=0.0, patience:int=0):
     """
     Plays <iterations> rounds of a given Game between <correlation>-related
     Learning Automata.
@@ -601,8 +779,15 @@ def play(Game, correlation:Correlation, LearningRate:float=0.01, MemorySize:int=
 
     <adversarial> plays assume selecting the least beneficial types for players.
 
+    A positive <patience> allows stopping early: when the mean payoff changes
+    by less than <tolerance> during <patience> iterations in a row, the
+    learning is considered settled, and the mean payoff of the remaining
+    iterations is reported to be the last one.
+    Neither <patience> nor <tolerance> can be negative.
+
     Returns mean payoff over all automata at each step of iteration.
     """
+    assert patience >= 0 and tolerance >= 0, f"Negative patience or tolerance: {patience}, {tolerance}"
     nest = Game
     nest_lengths = []
     while type(nest) not in (int,float):
@@ -620,27 +805,49 @@ def play(Game, correlation:Correlation, LearningRate:float=0.01, MemorySize:int=
         raise Exception(f"Misdefined Game: {nest_lengths}")
     automata = [[LearningAutomaton(correlation,choices_count[i],LearningRate=LearningRate,MemorySize=MemorySize) for t in range(types_count[i])] for i in range(N)]
     all_types = lambda i: tuple((a,) for a in range(types_count[i])) if i==N-1 else tuple((a,)+b for a in range(types_count[i]) for b in all_types(i+1))
-    types_stats = {t:[0,0] for t in all_types(0)} # types --> [total_sum_of_payoffs, total_plays]
+    types_list = all_types(0) # index --> types; uniformly random types are a uniformly random item of it
+    stats_sum = [0]*len(types_list) # index of types --> total_sum_of_payoffs
+    stats_cnt = [0]*len(types_list) # index of types --> total_plays
     progress = [] # iteration --> mean_payoff_over_all_automata
+    automata_count = sum(map(len,automata))
+    mean_payoffs_sum = 0.0 # sum of MeanPayoff() over all automata, updated as they play
+    payoffs_of = [] # index of types --> payoffs of each player over choice profiles (see ExpectedPayoffs)
+    players_of = [] # index of types --> automata playing a round of these types
+    for types in types_list:
+        payoffs = Game
+        for t in types: payoffs = payoffs[t]
+        payoffs = Flattened(payoffs, N)
+        payoffs_of.append([payoffs[i::N] for i in range(N)])
+        players_of.append([automata[i][t] for i,t in enumerate(types)])
+    settled = 0 # number of the last iterations with mean payoff changing less than <tolerance>
+    choices = [None]*N # player --> mixed strategy in the current round, filled in place
     for iteration in range(iterations):
         correlation.Prepare()
         if adversarial and random.random()>0.01:
-            types = min(types_stats.keys(), key=lambda t:-math.inf if types_stats[t][1]==0 else types_stats[t][0]/types_stats[t][1])
+            index = min(range(len(types_list)), key=lambda k:-math.inf if stats_cnt[k]==0 else stats_sum[k]/stats_cnt[k])
         else:
-            types = tuple(random.randrange(t) for t in types_count)
-        for i,t in enumerate(types): automata[i][t].Operate()
+            index = random.randrange(len(types_list))
+        players = players_of[index]
+        for player in players: player.Operate()
         correlation.Observe()
-        choices = [automata[i][t].Choose() for i,t in enumerate(types)]
-        payoffs = Game
-        for t in types: payoffs = payoffs[t]
-        ExpectedPayoffs = lambda i,pp: pp if i==N else map(sum,zip(*([p*Pr for p in ExpectedPayoffs(i+1,pp[c])] for c,Pr in enumerate(choices[i]))))
-        payoffs = tuple(ExpectedPayoffs(0, payoffs))
+        for i,player in enumerate(players): choices[i] = player.Choose()
+        payoffs = ExpectedPayoffs(payoffs_of[index], choices)
         ### floats = lambda ff: "["+" ".join((f"{f:.2f}" if type(f) in (float,int) else floats(f) for f in ff))+"]"
-        ### print(types, [automata[0][types[0]]._Observable, automata[1][types[1]]._Observable], floats(choices), floats(payoffs))
-        for i,t in enumerate(types): automata[i][t].Remember(payoffs[i])
-        types_stats[types][0] += sum(payoffs)
-        types_stats[types][1] += 1
-        progress.append(sum((a.MeanPayoff() for automaton in automata for a in automaton)) / sum(map(len,automata)))
-    ### print(types_stats)
+        ### print(types_list[index], [player._Observable for player in players], floats(choices), floats(payoffs))
+        total_payoff = 0.0
+        for player,payoff in zip(players,payoffs):
+            mean_payoffs_sum -= player.MeanPayoff()
+            player.Remember(payoff)
+            mean_payoffs_sum += player.MeanPayoff()
+            total_payoff += payoff
+        stats_sum[index] += total_payoff
+        stats_cnt[index] += 1
+        progress.append(mean_payoffs_sum / automata_count)
+        if patience > 0:
+            settled = settled+1 if len(progress)>1 and abs(progress[-1]-progress[-2])<tolerance else 0
+            if settled >= patience:
+                progress += [progress[-1]] * (iterations-len(progress))
+                break
+    ### print(dict(zip(types_list, zip(stats_sum, stats_cnt))))
     return progress
 
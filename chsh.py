@@ -1,3 +1,6 @@
+import multiprocessing
+import random
+
 import CorrelatedAutomata as CA
 
 LearningRate = 0.01
@@ -11,17 +14,25 @@ XOR = [[-1,+1],[+1,-1]]
 CHSH = [[CA.Coordinated(EQUAL), CA.Coordinated(EQUAL)],
         [CA.Coordinated(EQUAL), CA.Coordinated(XOR)]]
 
-qq, cc = [[] for i in range(iterations)], [[] for i in range(iterations)]
-for tests in range(tests_count):
+def test(seed):
+    # tests are independent, so they run in parallel; seeding makes them reproducible
+    random.seed(seed)
     c = CA.play(CHSH, CA.ClassicalCorrelation(RegisterSize=2), LearningRate, MemorySize, iterations)
     q = CA.play(CHSH, CA.QuantumCorrelation(RegisterSize=2), LearningRate, MemorySize, iterations)
-    for i,x in enumerate(c): cc[i].append(x)
-    for i,x in enumerate(q): qq[i].append(x)
-    print(f"{tests+1}\t{c[-1]}\t{q[-1]}")
+    return c, q
+
+if __name__ == "__main__":
+    qq, cc = [None]*tests_count, [None]*tests_count # test --> progress of the automata
+    log = [] # progress lines, printed in batches of 10 tests
+    with multiprocessing.Pool() as pool:
+        for tests, (c, q) in enumerate(pool.imap(test, range(tests_count))):
+            cc[tests], qq[tests] = c, q
+            log.append(f"{tests+1}\t{c[-1]}\t{q[-1]}")
+            if len(log) == 10 or tests+1 == tests_count:
+                print("\n".join(log))
+                log.clear()
 
-with open(f"chsh_{tests}_averages.csv", "w") as stats:
-    stats.write(f"Step\tAverage payoff of Classical automata\ttAverage payoff (over of Quantum automata\n")
-    for step, (average_payoff_classical, average_payoff_quantum) in enumerate(zip(cc,qq)):
-        average_payoff_classical = sum(average_payoff_classical) / len(average_payoff_classical)
-        average_payoff_quantum = sum(average_payoff_quantum)/len(average_payoff_quantum)
-        stats.write(f"{step+1}\t{average_payoff_classical}\t{average_payoff_quantum}\n")
+    rows = [f"Step\tAverage payoff of Classical automata\ttAverage payoff (over of Quantum automata\n"]
+    rows += (f"{step+1}\t{sum(classical)/len(classical)}\t{sum(quantum)/len(quantum)}\n" for step, (classical, quantum) in enumerate(zip(zip(*cc),zip(*qq))))
+    with open(f"chsh_{tests}_averages.csv", "w") as stats:
+        stats.write("".join(rows))